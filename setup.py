@@ -37,7 +37,12 @@ setup(
     zip_safe=True,
     install_requires=["requests>=2.20.0", "cryptography>=2.8", "numpy>=1.18", "protobuf>=3.12.4", "aiohttp>=3.7.4.post0"],
     extras_require={
-        "all": ["pytest>=6.2.1", "click>=7.1", "pytest-asyncio>=0.14.0"]
+        "all": ["pytest>=6.2.1", "click>=7.1", "pytest-asyncio>=0.14.0"],
+        "fast": [
+            "orjson>=3.4.0",
+            "uvloop>=0.14.0; sys_platform != 'win32'",
+            "msgspec>=0.16.0; python_version >= '3.8'",
+        ],
     },
     classifiers=[
         'Programming Language :: Python :: 3.7',
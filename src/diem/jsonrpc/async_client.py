@@ -573,6 +573,55 @@ class AsyncClient:
         except parser.ParseError as e:
             raise InvalidServerResponse(f"Parse result failed: {e}, response: {json}")
 
+    async def batch(
+        self, calls: typing.List[typing.Tuple[str, typing.List[typing.Any]]]  # pyre-ignore
+    ) -> typing.List[typing.Any]:  # pyre-ignore
+        """execute multiple JSON-RPC get method calls in one http request
+
+        Each call is a tuple of method name and params, e.g. `("get_account", [address_hex])`; only methods
+        listed in `BATCH_RESULT_PARSERS` are supported. Returns parsed results in the same order of the calls.
+
+        Falls back to execute calls one by one when server does not respond batch request with a list of
+        responses, see [JSON-RPC SPEC 2.0 Batch](https://www.jsonrpc.org/specification#batch).
+        """
+
+        return await self._retry.execute(functools.partial(self.batch_without_retry, calls))
+
+    async def batch_without_retry(
+        self, calls: typing.List[typing.Tuple[str, typing.List[typing.Any]]]  # pyre-ignore
+    ) -> typing.List[typing.Any]:  # pyre-ignore
+        """execute multiple JSON-RPC get method calls in one http request without retry any error.
+
+        Raises same errors with `execute_without_retry`.
+        """
+
+        for method, _ in calls:
+            if method not in BATCH_RESULT_PARSERS:
+                raise ValueError(f"unsupported batch method: {method}")
+        requests = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params or []}
+            for i, (method, params) in enumerate(calls)
+        ]
+        responses = await self._rs.send_request(self, requests, False)  # pyre-ignore
+        if not isinstance(responses, list):
+            return [await self.execute_without_retry(m, p, BATCH_RESULT_PARSERS[m]) for m, p in calls]
+
+        by_id = {resp.get("id"): resp for resp in responses if isinstance(resp, dict)}
+        results = []
+        for i, (method, _) in enumerate(calls):
+            json = by_id.get(i)
+            if json is None:
+                raise InvalidServerResponse(f"No response for batch request id {i}: {responses}")
+            if "error" in json:
+                raise JsonRpcError(f"{json['error']}")
+            if "result" not in json:
+                raise InvalidServerResponse(f"No error or result in response: {json}")
+            try:
+                results.append(BATCH_RESULT_PARSERS[method](json["result"]))
+            except parser.ParseError as e:
+                raise InvalidServerResponse(f"Parse result failed: {e}, response: {json}")
+        return results
+
     async def _send_http_request(
         self,
         url: str,
@@ -591,15 +640,16 @@ class AsyncClient:
                     raise InvalidServerResponse(f"Parse response as json failed: {e}, response: {response.text}")
 
         # check stable response before check jsonrpc error
-        try:
-            self.update_last_known_state(
-                json.get("diem_chain_id"),
-                json.get("diem_ledger_version"),
-                json.get("diem_ledger_timestampusec"),
-            )
-        except StaleResponseError as e:
-            if not ignore_stale_response:
-                raise e
+        for resp in json if isinstance(json, list) else [json]:
+            try:
+                self.update_last_known_state(
+                    resp.get("diem_chain_id"),
+                    resp.get("diem_ledger_version"),
+                    resp.get("diem_ledger_timestampusec"),
+                )
+            except StaleResponseError as e:
+                if not ignore_stale_response:
+                    raise e
 
         return json
 
@@ -611,3 +661,10 @@ def _parse_obj(factory):  # pyre-ignore
 def _parse_list(factory):  # pyre-ignore
     parser = _parse_obj(factory)
     return lambda result: list(map(parser, result)) if result else []
+
+
+BATCH_RESULT_PARSERS: typing.Dict[str, typing.Callable] = {  # pyre-ignore
+    "get_metadata": _parse_obj(lambda: rpc.Metadata()),
+    "get_currencies": _parse_list(lambda: rpc.CurrencyInfo()),
+    "get_account": _parse_obj(lambda: rpc.Account()),
+}
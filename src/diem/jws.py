@@ -11,7 +11,7 @@ The `encode` and `decode` functions handle JWS message with the following requir
 
 """
 
-from typing import Any, Callable, Dict, Tuple
+from typing import Any, Awaitable, Callable, Dict, Tuple, Union
 import base64, json
 
 
@@ -25,13 +25,15 @@ class InvalidHeaderError(ValueError):
 
 
 def encode(
-    msg: str,
+    msg: Union[str, bytes],
     sign: Callable[[bytes], bytes],
     headers: Dict[str, Any] = {"alg": DIEM_ALG},
     content_detached: bool = False,
 ) -> bytes:
+    """encode message into JWS compact message, `msg` bytes should be `ENCODING` encoded"""
+
     header = encode_headers(headers)
-    payload = encode_b64url(msg.encode(ENCODING))
+    payload = encode_b64url(msg if isinstance(msg, bytes) else msg.encode(ENCODING))
     sig = sign(signing_message(payload, header))
     if content_detached:
         payload = b""
@@ -41,6 +43,33 @@ def encode(
 def decode(
     msg: bytes, verify: Callable[[bytes, bytes], None], detached_content: bytes = b""
 ) -> Tuple[Dict[str, Any], str]:
+    headers, body = decode_bytes(msg, verify, detached_content)
+    return (headers, body.decode(ENCODING))
+
+
+def decode_bytes(
+    msg: bytes, verify: Callable[[bytes, bytes], None], detached_content: bytes = b""
+) -> Tuple[Dict[str, Any], bytes]:
+    """same with `decode`, except the payload is returned as bytes without decoding it by `ENCODING`"""
+
+    protected_headers, body, sig, message = _split(msg, detached_content)
+    verify(sig, message)
+    return (protected_headers, decode_b64url(body))
+
+
+async def decode_bytes_async(
+    msg: bytes, verify: Callable[[bytes, bytes], Awaitable[None]], detached_content: bytes = b""
+) -> Tuple[Dict[str, Any], bytes]:
+    """same with `decode_bytes`, except `verify` is a coroutine function, e.g. verifies signature in a thread pool"""
+
+    protected_headers, body, sig, message = _split(msg, detached_content)
+    await verify(sig, message)
+    return (protected_headers, decode_b64url(body))
+
+
+def _split(msg: bytes, detached_content: bytes) -> Tuple[Dict[str, Any], bytes, bytes, bytes]:
+    """returns protected headers, encoded payload, signature and signing message of the JWS compact message"""
+
     parts = msg.split(b".")
     if len(parts) != 3:
         raise ValueError("invalid JWS compact message: %s" % msg)
@@ -49,6 +78,17 @@ def decode(
 
     if detached_content and not body:
         body = encode_b64url(detached_content)
+        message = signing_message(body, header)
+    else:
+        # the signing message is the original message without the signature part
+        message = msg[: len(header) + 1 + len(body)]
+
+    return (decode_headers(header), body, decode_b64url(sig), message)
+
+
+def decode_headers(header: bytes) -> Dict[str, Any]:
+    if header == _DEFAULT_ENCODED_HEADERS:
+        return {"alg": DIEM_ALG}
 
     try:
         header_text = decode_b64url(header).decode(ENCODING)
@@ -62,10 +102,7 @@ def decode(
 
     if not isinstance(protected_headers, dict) or protected_headers.get("alg") != DIEM_ALG:
         raise InvalidHeaderError(header_text)
-
-    verify(decode_b64url(sig), signing_message(body, header))
-
-    return (protected_headers, decode_b64url(body).decode(ENCODING))
+    return protected_headers
 
 
 def signing_message(payload: bytes, header: bytes) -> bytes:
@@ -86,3 +123,6 @@ def decode_b64url(msg: bytes) -> bytes:
 
 def fix_padding(input: bytes) -> bytes:
     return input + b"=" * (4 - (len(input) % 4))
+
+
+_DEFAULT_ENCODED_HEADERS: bytes = encode_headers({"alg": DIEM_ALG})
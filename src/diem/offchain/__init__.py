@@ -37,6 +37,7 @@ from .types import (
     individual_kyc_data,
     entity_kyc_data,
     to_json,
+    to_json_bytes,
     to_dict,
     from_json,
     from_dict,
@@ -2,7 +2,7 @@
 # SPDX-License-Identifier: Apache-2.0
 
 
-import typing, dataclasses, uuid, math, warnings, aiohttp
+import asyncio, concurrent.futures, typing, dataclasses, functools, os, time, warnings, aiohttp, urllib.parse
 
 from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
 from cryptography.exceptions import InvalidSignature
@@ -26,7 +26,7 @@ from .types import (
     to_dict,
     ReferenceIDCommandObject,
 )
-from .error import command_error, protocol_error
+from .error import command_error, protocol_error, Error
 
 from . import jws, http_header
 from .. import jsonrpc, diem_types, identifier, utils
@@ -35,8 +35,22 @@ from diem.jsonrpc.async_client import AsyncClient
 
 DEFAULT_CONNECT_TIMEOUT_SECS: float = 2.0
 DEFAULT_TIMEOUT_SECS: float = 30.0
+DEFAULT_KEEPALIVE_TIMEOUT_SECS: float = 30.0
+DEFAULT_POOL_LIMIT_PER_HOST: int = int(os.getenv("DIEM_OFFCHAIN_POOL_PER_HOST", "32"))
+# scale of the exchange rate fixed point number, same with Move module FixedPoint32 (32 bits fractional part)
+EXCHANGE_RATE_SCALE: int = 1 << 32
+DEFAULT_COMPLIANCE_KEY_CACHE_TTL_SECS: float = 30.0
+DEFAULT_CURRENCIES_CACHE_TTL_SECS: float = 30.0
+DEFAULT_METADATA_CACHE_TTL_SECS: float = 5.0
+# max number of entries kept by the caches keyed by counterparty account addresses
+DEFAULT_CACHE_MAX_SIZE: int = 4096
 T = typing.TypeVar("T")
 
+# Ed25519 signature verification releases GIL, verifies JWS signatures in threads to keep the event loop responsive.
+_crypto_pool = concurrent.futures.ThreadPoolExecutor(
+    max_workers=os.cpu_count(), thread_name_prefix="diem-offchain-crypto"
+)
+
 
 class CommandResponseError(Exception):
     def __init__(self, resp: CommandResponseObject) -> None:
@@ -44,6 +58,70 @@ class CommandResponseError(Exception):
         self.resp = resp
 
 
+def new_pooled_session() -> aiohttp.ClientSession:
+    """Creates http client session with keep-alive connection pool for sending requests to counterparty VASPs.
+
+    Must be called inside a running event loop.
+    """
+
+    connector = aiohttp.TCPConnector(
+        limit_per_host=DEFAULT_POOL_LIMIT_PER_HOST,
+        keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT_SECS,
+    )
+    timeout = aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT_SECS, connect=DEFAULT_CONNECT_TIMEOUT_SECS)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+@dataclasses.dataclass
+class _TtlCache:
+    """Read-through cache for values fetched by coroutines, entries expire after `ttl_secs`.
+
+    Concurrent misses of the same key are coalesced: only the first caller fetches, the others wait
+    for its result.
+
+    At most `max_size` entries are kept: expired entries and then the earliest put entries are dropped
+    when a new entry is put.
+    """
+
+    ttl_secs: float
+    max_size: int = DEFAULT_CACHE_MAX_SIZE
+    _entries: typing.Dict[str, typing.Tuple[float, typing.Any]] = dataclasses.field(default_factory=dict)
+    _locks: typing.Dict[str, asyncio.Lock] = dataclasses.field(default_factory=dict)
+
+    async def get(self, key: str, fetch: typing.Callable[[], typing.Awaitable[T]]) -> T:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+            try:
+                value = await fetch()
+                self.put(key, value)
+                return value
+            finally:
+                # a waiter of an earlier failed fetch may finish after a new lock is created for the key
+                if self._locks.get(key) is lock:
+                    del self._locks[key]
+
+    def put(self, key: str, value: typing.Any) -> None:  # pyre-ignore
+        now = time.monotonic()
+        # re-insert the key, so that entries are ordered by expiration time
+        self._entries.pop(key, None)
+        self._entries[key] = (now + self.ttl_secs, value)
+        while self._entries and (len(self._entries) > self.max_size or next(iter(self._entries.values()))[0] < now):
+            del self._entries[next(iter(self._entries))]
+
+    def invalidate(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def is_fresh(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+
 class InvalidCurrencyCodeError(ValueError):
     pass
 
@@ -81,6 +159,18 @@ class Client:
     >>> await client.send_command(command, account.compliance_key.sign)
     ```
 
+    Outbound requests share one http client session (created by `session_factory` on first request),
+    so that connections to the same counterparty VASP are reused. Call `close` to release it when
+    the client is no longer needed.
+    Concurrent requests to the same counterparty host are limited by `max_concurrent_requests_per_host`,
+    which defaults to the connection pool size per host, so that a burst of commands waits for a pooled
+    connection instead of opening new connections.
+
+    On-chain data used for processing commands (counterparty base url and compliance key, parent VASP of
+    an account, currencies and metadata) is cached for the configured TTL seconds. A cached compliance key
+    is dropped when a JWS signature verification fails with it, so that a rotated key is fetched on the
+    next request.
+
     See [mini-wallet application](https://diem.github.io/client-sdk-python/diem/testing/miniwallet/app/app.html) for full example
     """
 
@@ -88,10 +178,59 @@ class Client:
     jsonrpc_client: AsyncClient
     hrp: str
     supported_currency_codes: typing.Optional[typing.List[str]] = dataclasses.field(default=None)
+    # account identifiers (without subaddress) of the accounts owned by the VASP, e.g. child VASP accounts.
+    owned_account_ids: typing.Set[str] = dataclasses.field(default_factory=set)
+    session_factory: typing.Callable[[], aiohttp.ClientSession] = dataclasses.field(default=new_pooled_session)
+    compliance_key_cache_ttl_secs: float = dataclasses.field(default=DEFAULT_COMPLIANCE_KEY_CACHE_TTL_SECS)
+    currencies_cache_ttl_secs: float = dataclasses.field(default=DEFAULT_CURRENCIES_CACHE_TTL_SECS)
+    metadata_cache_ttl_secs: float = dataclasses.field(default=DEFAULT_METADATA_CACHE_TTL_SECS)
+    max_concurrent_requests_per_host: int = dataclasses.field(default=DEFAULT_POOL_LIMIT_PER_HOST)
     my_compliance_key_account_id: str = dataclasses.field(init=False)
+    _session: typing.Optional[aiohttp.ClientSession] = dataclasses.field(default=None, init=False, repr=False)
+    _per_host_sem: typing.Dict[str, asyncio.Semaphore] = dataclasses.field(default_factory=dict, init=False, repr=False)
+    _background_tasks: typing.Set["asyncio.Task[typing.Any]"] = dataclasses.field(
+        default_factory=set, init=False, repr=False
+    )
+    _compliance_cache: _TtlCache = dataclasses.field(init=False, repr=False)
+    _currencies_cache: _TtlCache = dataclasses.field(init=False, repr=False)
+    _metadata_cache: _TtlCache = dataclasses.field(init=False, repr=False)
+    _parent_vasp_cache: _TtlCache = dataclasses.field(init=False, repr=False)
+    _supported_codes: typing.Optional[typing.FrozenSet[str]] = dataclasses.field(init=False, repr=False)
+    _indexed_currencies: typing.List[jsonrpc.CurrencyInfo] = dataclasses.field(
+        default_factory=list, init=False, repr=False
+    )
+    _currencies_by_code: typing.Dict[str, jsonrpc.CurrencyInfo] = dataclasses.field(
+        default_factory=dict, init=False, repr=False
+    )
+    _scaled_exchange_rates: typing.Dict[str, int] = dataclasses.field(default_factory=dict, init=False, repr=False)
 
     def __post_init__(self) -> None:
         self.my_compliance_key_account_id = self.account_id(self.my_compliance_key_account_address)
+        self._compliance_cache = _TtlCache(self.compliance_key_cache_ttl_secs)
+        self._currencies_cache = _TtlCache(self.currencies_cache_ttl_secs)
+        self._metadata_cache = _TtlCache(self.metadata_cache_ttl_secs)
+        self._parent_vasp_cache = _TtlCache(self.compliance_key_cache_ttl_secs)
+        codes = self.supported_currency_codes
+        self._supported_codes = None if codes is None else frozenset(codes)
+
+    def session(self) -> aiohttp.ClientSession:
+        """returns the shared http client session, creates a new one if it is not created or closed"""
+
+        if self._session is None or self._session.closed:
+            self._session = self.session_factory()
+        return self._session
+
+    async def close(self) -> None:
+        """close the shared http client session and its pooled connections, cancels unfinished background tasks"""
+
+        tasks = list(self._background_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        self._per_host_sem.clear()
 
     async def ping(
         self,
@@ -100,7 +239,7 @@ class Client:
         cid: typing.Optional[str] = None,
     ) -> CommandResponseObject:
         request = CommandRequestObject(
-            cid=cid or str(uuid.uuid4()),
+            cid=cid or _new_cid(),
             command_type=CommandType.PingCommand,
             command={"_ObjectType": CommandType.PingCommand},
         )
@@ -121,7 +260,7 @@ class Client:
             sender=sender, sender_address=sender_address, receiver=receiver, reference_id=reference_id
         )
         request = CommandRequestObject(
-            cid=cid or str(uuid.uuid4()),
+            cid=cid or _new_cid(),
             command_type=CommandType.ReferenceIDCommand,
             command=to_dict(reference_id_command_object),
         )
@@ -138,21 +277,30 @@ class Client:
     async def send_request(
         self, request_sender_address: str, counterparty_account_id: str, request_bytes: bytes
     ) -> CommandResponseObject:
-        base_url, public_key = await self.get_base_url_and_compliance_key(counterparty_account_id)
+        _, public_key, url = await self._get_counterparty_info(counterparty_account_id)
         headers = {
-            http_header.X_REQUEST_ID: str(uuid.uuid4()),
+            http_header.X_REQUEST_ID: _new_cid(),
             http_header.X_REQUEST_SENDER_ADDRESS: request_sender_address,
         }
-        url = f"{base_url.rstrip('/')}/v2/command"
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, data=request_bytes, headers=headers) as response:
+        async with self.host_semaphore(url):
+            async with self.session().post(url, data=request_bytes, headers=headers) as response:
                 if response.status not in [200, 400]:
                     response.raise_for_status()
 
-                cmd_resp = _deserialize_jws(await response.read(), CommandResponseObject, public_key)
-                if cmd_resp.status == CommandResponseStatus.failure:
-                    raise CommandResponseError(cmd_resp)
-                return cmd_resp
+                body = await response.read()
+        cmd_resp = await self._deserialize_jws(counterparty_account_id, body, CommandResponseObject, public_key)
+        if cmd_resp.status == CommandResponseStatus.failure:
+            raise CommandResponseError(cmd_resp)
+        return cmd_resp
+
+    def host_semaphore(self, url: str) -> asyncio.Semaphore:
+        """returns the semaphore limiting concurrent requests to the host of the given url"""
+
+        host = urllib.parse.urlsplit(url).netloc
+        sem = self._per_host_sem.get(host)
+        if sem is None:
+            sem = self._per_host_sem[host] = asyncio.Semaphore(self.max_concurrent_requests_per_host)
+        return sem
 
     async def process_inbound_request(self, request_sender_address: str, request_bytes: bytes) -> Command:
         """Deprecated
@@ -188,7 +336,7 @@ class Client:
         if not request_sender_address:
             raise protocol_error(ErrorCode.missing_http_header, f"missing {http_header.X_REQUEST_SENDER_ADDRESS}")
         public_key = await self.get_inbound_request_sender_public_key(request_sender_address)
-        return _deserialize_jws(request_bytes, CommandRequestObject, public_key)
+        return await self._deserialize_jws(request_sender_address, request_bytes, CommandRequestObject, public_key)
 
     async def process_inbound_payment_command_request(
         self, request_sender_address: str, request: CommandRequestObject
@@ -213,6 +361,11 @@ class Client:
 
         payment = deserialize_command(request.command, PaymentCommandObject).payment
         self.validate_addresses(payment, request_sender_address)
+        if not self._metadata_cache.is_fresh("metadata"):
+            # Fetch metadata for validating dual attestation limit of initial payment while looking up the
+            # actor accounts, the validation waits for the in-flight fetch through the cache. The state of
+            # the payment is unknown yet, matching it here costs more than warming the cache for updates.
+            self._run_in_background(self.get_metadata())
         cmd = await self.create_inbound_payment_command(request.cid, payment)
         if cmd.is_initial():
             await self.validate_dual_attestation_limit_by_action(cmd.payment.action)
@@ -248,7 +401,8 @@ class Client:
             raise command_error(ErrorCode.no_kyc_needed, msg, "command.payment.action.amount")
 
     async def is_under_dual_attestation_limit(self, currency: str, amount: int) -> typing.Optional[str]:
-        currencies = await self.jsonrpc_client.get_currencies()
+        metadata = await self.get_metadata()
+        currencies = await self.get_currencies()
         try:
             await self.validate_currency_code(currency, currencies)
         except InvalidCurrencyCodeError as e:
@@ -256,29 +410,43 @@ class Client:
         except UnsupportedCurrencyCodeError as e:
             raise command_error(ErrorCode.unsupported_currency, str(e), "command.payment.action.currency")
 
-        metadata = await self.jsonrpc_client.get_metadata()
         limit = metadata.dual_attestation_limit
-        for info in currencies:
-            if info.code == currency:
-                if _is_under_the_threshold(limit, info.to_xdx_exchange_rate, amount):
-                    return "payment amount is %s (rate: %s) under travel rule threshold %s" % (
-                        amount,
-                        info.to_xdx_exchange_rate,
-                        limit,
-                    )
+        info = self._index_currencies(currencies)[currency]
+        rate_scaled = self._scaled_exchange_rates[currency]
+        if _is_under_the_threshold(limit, rate_scaled, EXCHANGE_RATE_SCALE, amount):
+            return "payment amount is %s (rate: %s) under travel rule threshold %s" % (
+                amount,
+                info.to_xdx_exchange_rate,
+                limit,
+            )
 
     async def validate_currency_code(
         self, currency: str, currencies: typing.Optional[typing.List[jsonrpc.CurrencyInfo]] = None
     ) -> None:
         if currencies is None:
-            currencies = await self.jsonrpc_client.get_currencies()
-        currency_codes = list(map(lambda c: c.code, currencies))
-        supported_codes = _filter_supported_currency_codes(self.supported_currency_codes, currency_codes)
-        if currency not in currency_codes:
+            currencies = await self.get_currencies()
+        if currency not in self._index_currencies(currencies):
             raise InvalidCurrencyCodeError(f"currency code is invalid: {currency}")
-        if currency not in supported_codes:
+        if self._supported_codes is not None and currency not in self._supported_codes:
             raise UnsupportedCurrencyCodeError(f"currency code is not supported: {currency}")
 
+    def _index_currencies(
+        self, currencies: typing.List[jsonrpc.CurrencyInfo]
+    ) -> typing.Dict[str, jsonrpc.CurrencyInfo]:
+        """returns given currencies indexed by currency code
+
+        The index is re-built only when given currencies list is not the last one indexed, e.g. the cached
+        currencies list is refreshed.
+        """
+
+        if currencies is not self._indexed_currencies:
+            self._currencies_by_code = {info.code: info for info in currencies}
+            self._scaled_exchange_rates = {
+                info.code: round(info.to_xdx_exchange_rate * EXCHANGE_RATE_SCALE) for info in currencies
+            }
+            self._indexed_currencies = currencies
+        return self._currencies_by_code
+
     def validate_addresses(self, payment: PaymentObject, request_sender_address: str) -> None:
         self.validate_actor_address("sender", payment.sender)
         self.validate_actor_address("receiver", payment.receiver)
@@ -286,7 +454,7 @@ class Client:
 
     def validate_actor_address(self, actor_name: str, actor: PaymentActorObject) -> None:
         try:
-            identifier.decode_account(actor.address, self.hrp)
+            _decode_account_id(actor.address, self.hrp)
         except ValueError as e:
             raise command_error(
                 ErrorCode.invalid_field_value,
@@ -310,35 +478,115 @@ class Client:
         raise command_error(ErrorCode.unknown_address, "unknown actor addresses: {obj}")
 
     async def is_my_account_id(self, account_id: str) -> bool:
-        account_address, _ = identifier.decode_account(account_id, self.hrp)
-        if self.my_compliance_key_account_id == self.account_id(account_address):
+        account_address, _ = _decode_account_id(account_id, self.hrp)
+        address_id = self.account_id(account_address)
+        if self.my_compliance_key_account_id == address_id or address_id in self.owned_account_ids:
             return True
+        parent_vasp_id = await self._parent_vasp_cache.get(
+            address_id, lambda: self._get_parent_vasp_account_id(account_address)
+        )
+        return self.my_compliance_key_account_id == parent_vasp_id
+
+    async def _get_parent_vasp_account_id(self, account_address: diem_types.AccountAddress) -> typing.Optional[str]:
         account = await self.jsonrpc_client.get_account(account_address)
         if account and account.role.parent_vasp_address:
-            return self.my_compliance_key_account_id == self.account_id(account.role.parent_vasp_address)
-        return False
+            return self.account_id(account.role.parent_vasp_address)
+        return None
 
     def account_id(self, address: typing.Union[diem_types.AccountAddress, bytes, str]) -> str:
-        return identifier.encode_account(utils.account_address(address), None, self.hrp)
+        return _encode_account_id(utils.account_address(address), self.hrp)
 
     async def get_base_url_and_compliance_key(self, account_id: str) -> typing.Tuple[str, Ed25519PublicKey]:
-        account_address, _ = identifier.decode_account(account_id, self.hrp)
-        return await self.jsonrpc_client.get_base_url_and_compliance_key(account_address)
+        base_url, public_key, _ = await self._get_counterparty_info(account_id)
+        return (base_url, public_key)
+
+    async def _get_counterparty_info(self, account_id: str) -> typing.Tuple[str, Ed25519PublicKey, str]:
+        """returns base url, compliance key and command url of the VASP owns the given account"""
+
+        account_address, _ = _decode_account_id(account_id, self.hrp)
+        return await self._compliance_cache.get(
+            account_address.to_hex(), lambda: self._fetch_counterparty_info(account_address)
+        )
+
+    async def _fetch_counterparty_info(
+        self, account_address: diem_types.AccountAddress
+    ) -> typing.Tuple[str, Ed25519PublicKey, str]:
+        base_url, public_key = await self.jsonrpc_client.get_base_url_and_compliance_key(account_address)
+        return (base_url, public_key, f"{base_url.rstrip('/')}/v2/command")
+
+    async def get_currencies(self) -> typing.List[jsonrpc.CurrencyInfo]:
+        return await self._currencies_cache.get("currencies", self.jsonrpc_client.get_currencies)
+
+    async def get_metadata(self) -> jsonrpc.Metadata:
+        return await self._metadata_cache.get("metadata", self._fetch_metadata_and_currencies)
+
+    async def _fetch_metadata_and_currencies(self) -> jsonrpc.Metadata:
+        # currencies are refreshed together with metadata in one batch request, so that checking
+        # dual attestation limit needs at most one JSON-RPC round trip.
+        metadata, currencies = await self.jsonrpc_client.batch([("get_metadata", []), ("get_currencies", [])])
+        self._currencies_cache.put("currencies", currencies)
+        return metadata
+
+    def _run_in_background(self, coro: typing.Awaitable[typing.Any]) -> None:  # pyre-ignore
+        """runs the coroutine to complete without waiting for it, e.g. fills a cache for following requests"""
+
+        task = asyncio.ensure_future(coro)
+        # keep reference of the task, the event loop only keeps weak references of tasks
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_background_task_done)
+
+    def _on_background_task_done(self, task: "asyncio.Task[typing.Any]") -> None:
+        self._background_tasks.discard(task)
+        if not task.cancelled():
+            # retrieve the exception to avoid "exception was never retrieved" warnings, callers
+            # waiting for the same data through a cache fetch it again when it failed.
+            task.exception()
+
+    async def _deserialize_jws(
+        self, account_id: str, content_bytes: bytes, klass: typing.Type[T], public_key: Ed25519PublicKey
+    ) -> T:
+        try:
+            return await _deserialize_jws(content_bytes, klass, public_key)
+        except Error as e:
+            if e.obj.code == ErrorCode.invalid_jws_signature:
+                account_address, _ = _decode_account_id(account_id, self.hrp)
+                self._compliance_cache.invalidate(account_address.to_hex())
+            raise e
+
+
+@functools.lru_cache(maxsize=4096)
+def _encode_account_id(address: diem_types.AccountAddress, hrp: str) -> str:
+    return identifier.encode_account(address, None, hrp)
+
+
+# account identifiers of a command are decoded multiple times while processing it: validating addresses,
+# checking the receiver is owned by this VASP and fetching the sender's compliance key.
+@functools.lru_cache(maxsize=8192)
+def _decode_account_id(account_id: str, hrp: str) -> typing.Tuple[diem_types.AccountAddress, typing.Optional[bytes]]:
+    return identifier.decode_account(account_id, hrp)
+
+
+def _new_cid() -> str:
+    """returns a random (version 4) UUID string, same as `str(uuid.uuid4())` without creating `uuid.UUID` object"""
+
+    b = bytearray(os.urandom(16))
+    b[6] = (b[6] & 0x0F) | 0x40
+    b[8] = (b[8] & 0x3F) | 0x80
+    h = b.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
 
 
-def _filter_supported_currency_codes(
-    supported_codes: typing.Optional[typing.List[str]], codes: typing.List[str]
-) -> typing.List[str]:
-    return list(filter(lambda code: supported_codes is None or code in supported_codes, codes))
+async def _verify_signature(public_key: Ed25519PublicKey, sig: bytes, msg: bytes) -> None:
+    await asyncio.get_running_loop().run_in_executor(_crypto_pool, public_key.verify, sig, msg)
 
 
-def _deserialize_jws(
+async def _deserialize_jws(
     content_bytes: bytes,
     klass: typing.Type[T],
     public_key: Ed25519PublicKey,
 ) -> T:
     try:
-        return jws.deserialize(content_bytes, klass, public_key.verify)
+        return await jws.deserialize_async(content_bytes, klass, functools.partial(_verify_signature, public_key))
     except JSONDecodeError as e:
         raise protocol_error(ErrorCode.invalid_json, f"decode json string failed: {e}", None) from e
     except FieldError as e:
@@ -356,9 +604,9 @@ def deserialize_command(command: typing.Dict[str, typing.Any], klass: typing.Typ
         raise command_error(e.code, f"invalid {klass.__name__} json: {e}", e.field) from e
 
 
-def _is_under_the_threshold(limit: int, rate: float, amount: int) -> bool:
-    # use ceil of the xdx exchanged amount to ensure a valid amount
-    # is not considered as under the threshold because of float number
-    # transport or calculation difference comparing with Move module
-    # implementation.
-    return math.ceil(rate * amount) < limit
+def _is_under_the_threshold(limit: int, rate_scaled: int, scale: int, amount: int) -> bool:
+    # the exchange rate is a fixed point number `rate_scaled / scale`, calculating with integers
+    # avoids float number calculation difference comparing with Move module implementation.
+    # use ceil of the xdx exchanged amount to ensure a valid amount is not considered as under
+    # the threshold because of rounding.
+    return (rate_scaled * amount + scale - 1) // scale < limit
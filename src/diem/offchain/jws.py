@@ -13,7 +13,7 @@ The `serialize` and `deserialize` functions handle JWS message with the followin
 
 import typing
 
-from . import CommandRequestObject, CommandResponseObject, to_json, from_json
+from . import CommandRequestObject, CommandResponseObject, to_json_bytes, from_json
 from .. import jws
 
 
@@ -24,7 +24,7 @@ def serialize(
     obj: typing.Union[CommandRequestObject, CommandResponseObject],
     sign: typing.Callable[[bytes], bytes],
 ) -> bytes:
-    return jws.encode(to_json(obj), sign)
+    return jws.encode(to_json_bytes(obj), sign)
 
 
 def deserialize(
@@ -32,5 +32,16 @@ def deserialize(
     klass: typing.Type[T],
     verify: typing.Callable[[bytes, bytes], None],
 ) -> T:
-    _, body = jws.decode(msg, verify)
+    _, body = jws.decode_bytes(msg, verify)
+    return from_json(body, klass)
+
+
+async def deserialize_async(
+    msg: bytes,
+    klass: typing.Type[T],
+    verify: typing.Callable[[bytes, bytes], typing.Awaitable[None]],
+) -> T:
+    """same with `deserialize`, except `verify` is a coroutine function"""
+
+    _, body = await jws.decode_bytes_async(msg, verify)
     return from_json(body, klass)
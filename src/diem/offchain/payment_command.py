@@ -3,7 +3,7 @@
 
 """This module defines `PaymentCommand` class provides utils for processing `PaymentCommand` properly."""
 
-import typing, dataclasses, uuid, warnings
+import typing, dataclasses, functools, uuid, warnings
 
 from .types import (
     CommandRequestObject,
@@ -281,9 +281,18 @@ class PaymentCommand(Command):
         return self.travel_rule_metadata_and_sig_msg(hrp)[0]
 
     def travel_rule_metadata_and_sig_msg(self, hrp: str) -> typing.Tuple[bytes, bytes]:
-        return txnmetadata.travel_rule(
-            self.payment.reference_id, self.sender_account_address(hrp), self.payment.action.amount
+        return _travel_rule_metadata_and_sig_msg(
+            self.payment.reference_id, self.payment.sender.address, self.payment.action.amount, hrp
         )
 
     def __str__(self) -> str:
         return f"[payment#{self.cid} {self.my_actor_address} {summary(self.payment)}]"
+
+
+@functools.lru_cache(maxsize=1024)
+def _travel_rule_metadata_and_sig_msg(
+    reference_id: str, sender_account_id: str, amount: int, hrp: str
+) -> typing.Tuple[bytes, bytes]:
+    # cached for validating recipient signature of same payment multiple times, e.g. retried requests
+    sender_address = identifier.decode_account_address(sender_account_id, hrp)
+    return txnmetadata.travel_rule(reference_id, sender_address, amount)
@@ -34,7 +34,19 @@ from .payment_types import (
     PaymentCommandObject,
 )
 
-import dataclasses, json, re, secrets, typing, uuid
+import dataclasses, functools, json, re, secrets, typing, uuid
+
+try:
+    # optional, install `diem[fast]` for faster json encoding and decoding
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # optional, install `diem[fast]` for decoding json into data structures by msgspec
+    from . import _msgspec
+except ImportError:
+    _msgspec = None
 
 
 class FieldError(ValueError):
@@ -69,6 +81,14 @@ def to_json(obj: T, indent: typing.Optional[int] = None) -> str:
     return json.dumps(to_dict(obj), indent=indent)
 
 
+def to_json_bytes(obj: T) -> bytes:
+    """serialize object into compact utf-8 encoded json bytes, uses `orjson` if it is installed"""
+
+    if orjson is not None:
+        return orjson.dumps(to_dict(obj))
+    return json.dumps(to_dict(obj), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
 def to_dict(obj: T) -> typing.Dict[str, typing.Any]:
     if dataclasses.is_dataclass(obj):
         raw = dataclasses.asdict(obj)
@@ -79,8 +99,20 @@ def to_dict(obj: T) -> typing.Dict[str, typing.Any]:
     return _delete_none(raw)
 
 
-def from_json(data: str, klass: typing.Optional[typing.Type[T]] = None) -> T:
-    return from_dict(json.loads(data), klass)
+def from_json(data: typing.Union[str, bytes], klass: typing.Optional[typing.Type[T]] = None) -> T:
+    """deserialize json string or utf-8 encoded json bytes into object, uses `orjson` if it is installed
+
+    Raises `json.JSONDecodeError` if data is invalid json.
+    """
+
+    if _msgspec is not None and klass is not None and _msgspec.is_supported(klass):
+        try:
+            return _msgspec.decode(data, klass)
+        except (_msgspec.msgspec.ValidationError, _msgspec.msgspec.DecodeError):
+            pass  # decode again by `from_dict` for the error details
+    if orjson is not None:
+        return from_dict(orjson.loads(data), klass)
+    return from_dict(json.loads(data.decode("utf-8") if isinstance(data, bytes) else data), klass)
 
 
 def from_dict(obj: typing.Any, klass: typing.Optional[typing.Type[T]] = None, field_path: str = "") -> T:  # pyre-ignore
@@ -89,6 +121,11 @@ def from_dict(obj: typing.Any, klass: typing.Optional[typing.Type[T]] = None, fi
             code = ErrorCode.invalid_field_value if field_path else ErrorCode.invalid_object
             raise FieldError(code, field_path, f"expect json object, but got {type(obj).__name__}: {obj}")
         klass = _find_object_type(obj, field_path)
+    elif _msgspec is not None and isinstance(obj, dict) and _msgspec.is_supported(klass):
+        try:
+            return _msgspec.convert(obj, klass)
+        except _msgspec.msgspec.ValidationError:
+            pass  # decode again by `_from_dict` for the error details
     return _from_dict(obj, klass, field_path)
 
 
@@ -105,43 +142,109 @@ def _from_dict(obj: typing.Any, klass: typing.Type[typing.Any], field_path: str)
             return [from_dict(item, item_type, field_path) for item in obj]
         return obj
 
-    unknown_fields = list(obj.keys())
-    fields = {}
+    return _dataclass_decoder(klass)(obj, field_path)
+
+
+@functools.lru_cache(maxsize=None)
+def _dataclass_fields(  # pyre-ignore
+    klass: typing.Type[typing.Any],
+) -> typing.Tuple[typing.FrozenSet[str], typing.List[typing.Tuple[dataclasses.Field, typing.Any, bool]]]:
+    """returns field names and fields with resolved optional type of the given dataclass
+
+    The result is cached, so that decoding objects does not need to inspect dataclass field types every time.
+    """
+
+    fields_info = []
     for field in dataclasses.fields(klass):
-        if field.name in unknown_fields:
-            unknown_fields.remove(field.name)
-        fields[field.name] = _field_value_from_dict(field, obj, field_path)
-
-    if len(unknown_fields) > 0:
-        unknown_fields.sort()
-        full_name = _join_field_path(field_path, unknown_fields[0])
-        field_names = ", ".join(unknown_fields)
-        raise FieldError(ErrorCode.unknown_field, full_name, f"{field_path}: {field_names}")
-    return klass(**fields)
-
-
-def _field_value_from_dict(field: dataclasses.Field, obj: typing.Any, field_path: str) -> typing.Any:  # pyre-ignore
-    full_name = _join_field_path(field_path, field.name)
-    field_type = field.type
-    args = field.type.__args__ if hasattr(field.type, "__args__") else []
-    is_optional = len(args) == 2 and isinstance(None, args[1])  # pyre-ignore
-    if is_optional:
-        field_type = args[0]
-    val = obj.get(field.name)
-    if val is None:
+        field_type = field.type
+        args = field.type.__args__ if hasattr(field.type, "__args__") else []
+        is_optional = len(args) == 2 and isinstance(None, args[1])  # pyre-ignore
         if is_optional:
-            return None
-        raise FieldError(ErrorCode.missing_field, full_name, f"missing field: {full_name}")
+            field_type = args[0]
+        fields_info.append((field, field_type, is_optional))
+    return (frozenset(field.name for field in dataclasses.fields(klass)), fields_info)
+
+
+_PRIMITIVE_TYPES: typing.Tuple[type, ...] = (str, int, bool, float, dict)
+
 
-    valid_values = field.metadata.get("valid-values")
-    if valid_values:
-        if isinstance(valid_values, list) and val not in valid_values:
-            raise FieldError(ErrorCode.invalid_field_value, full_name, f"expect one of {valid_values}, but got: {val}")
-        if isinstance(val, str) and isinstance(valid_values, re.Pattern) and not valid_values.match(val):
-            raise FieldError(
-                ErrorCode.invalid_field_value, full_name, f"{val} does not match pattern {valid_values.pattern}"
+@functools.lru_cache(maxsize=None)
+def _dataclass_decoder(  # pyre-ignore
+    klass: typing.Type[typing.Any],
+) -> typing.Callable[[typing.Dict[str, typing.Any], str], typing.Any]:
+    """generates a function for decoding json object (dict) into the given dataclass
+
+    The function is specialized for the dataclass fields: field types and validations are resolved once when
+    it is generated instead of being inspected for every decoded object.
+    """
+
+    field_names, fields_info = _dataclass_fields(klass)
+    env: typing.Dict[str, typing.Any] = {
+        "klass": klass,
+        "field_names": field_names,
+        "FieldError": FieldError,
+        "ErrorCode": ErrorCode,
+        "from_dict": from_dict,
+        "join": _join_field_path,
+        "raise_unknown_fields": _raise_unknown_fields,
+    }
+    lines = ["def decode(obj, field_path):"]
+    for i, (field, field_type, is_optional) in enumerate(fields_info):
+        env[f"type_{i}"] = field_type
+        lines.append(f"    full_name = join(field_path, {field.name!r})")
+        lines.append(f"    val = obj.get({field.name!r})")
+        lines.append("    if val is None:")
+        if is_optional:
+            lines.append(f"        f_{i} = None")
+        else:
+            lines.append('        raise FieldError(ErrorCode.missing_field, full_name, f"missing field: {full_name}")')
+        lines.append("    else:")
+        valid_values = field.metadata.get("valid-values")
+        if valid_values:
+            env[f"valid_values_{i}"] = valid_values
+            if isinstance(valid_values, list):
+                lines.append(f"        if val not in valid_values_{i}:")
+                lines.append(
+                    "            raise FieldError(ErrorCode.invalid_field_value, full_name, "
+                    f'f"expect one of {{valid_values_{i}}}, but got: {{val}}")'
+                )
+            if isinstance(valid_values, re.Pattern):
+                lines.append(f"        if isinstance(val, str) and not valid_values_{i}.match(val):")
+                lines.append(
+                    "            raise FieldError(ErrorCode.invalid_field_value, full_name, "
+                    f'f"{{val}} does not match pattern {{valid_values_{i}.pattern}}")'
+                )
+        if field_type in _PRIMITIVE_TYPES:
+            lines.append(f"        if not isinstance(val, type_{i}):")
+            lines.append(
+                "            raise FieldError(ErrorCode.invalid_field_value, full_name, "
+                f'f"expect type {field_type.__name__}, but got {{type(val).__name__}}")'
+            )
+            lines.append(f"        f_{i} = val")
+        elif dataclasses.is_dataclass(field_type):
+            env[f"decode_{i}"] = _dataclass_decoder(field_type)
+            lines.append(
+                f"        f_{i} = decode_{i}(val, full_name) if isinstance(val, dict) "
+                f"else from_dict(val, type_{i}, full_name)"
             )
-    return from_dict(val, field_type, full_name)
+        else:
+            lines.append(f"        f_{i} = from_dict(val, type_{i}, full_name)")
+    lines.append("    if not field_names.issuperset(obj.keys()):")
+    lines.append("        raise_unknown_fields(obj, field_names, field_path)")
+    args = ", ".join(f"{field.name}=f_{i}" for i, (field, _, _) in enumerate(fields_info))
+    lines.append(f"    return klass({args})")
+
+    exec("\n".join(lines), env)
+    return env["decode"]
+
+
+def _raise_unknown_fields(
+    obj: typing.Dict[str, typing.Any], field_names: typing.FrozenSet[str], field_path: str
+) -> None:
+    unknown_fields = sorted(obj.keys() - field_names)
+    full_name = _join_field_path(field_path, unknown_fields[0])
+    unknown_field_names = ", ".join(unknown_fields)
+    raise FieldError(ErrorCode.unknown_field, full_name, f"{field_path}: {unknown_field_names}")
 
 
 def _join_field_path(path: str, field: str) -> str:
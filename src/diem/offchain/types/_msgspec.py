@@ -0,0 +1,126 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""This module defines `msgspec.Struct` mirrors of the off-chain data structures for decoding json in C.
+
+The mirror of a dataclass is generated from its fields: the field types and "valid-values" metadata are
+translated into the struct field types, so that a json object decoded by the struct is valid for `from_dict`
+too. Decoded structs are converted into the dataclass objects, callers of `from_json` and `from_dict` receive
+the same objects with or without `msgspec` installed.
+
+The mirrors do not report the field errors defined by the off-chain protocol, `decode` and `convert` raise
+`msgspec.ValidationError` or `msgspec.DecodeError` for invalid input, and callers should fall back to
+`from_dict` for the error details.
+
+`msgspec` is an optional dependency, importing this module raises `ImportError` if it is not installed.
+"""
+
+import dataclasses, functools, re, typing
+import msgspec
+
+
+T = typing.TypeVar("T")
+
+_PRIMITIVE_TYPES: typing.Tuple[type, ...] = (str, int, bool, dict)
+
+
+class UnsupportedTypeError(TypeError):
+    pass
+
+
+def decode(data: typing.Union[str, bytes], klass: typing.Type[T]) -> T:
+    """decode json string or utf-8 encoded json bytes into the given dataclass object"""
+
+    decoder, to_dataclass = _codec(klass)
+    return to_dataclass(decoder.decode(data))
+
+
+def convert(obj: typing.Dict[str, typing.Any], klass: typing.Type[T]) -> T:
+    """convert json object (dict) into the given dataclass object"""
+
+    decoder, to_dataclass = _codec(klass)
+    return to_dataclass(msgspec.convert(obj, decoder.type))
+
+
+def is_supported(klass: typing.Type[typing.Any]) -> bool:
+    """returns True if the given dataclass can be decoded by msgspec"""
+
+    try:
+        _codec(klass)
+    except UnsupportedTypeError:
+        return False
+    return True
+
+
+@functools.lru_cache(maxsize=None)
+def _codec(  # pyre-ignore
+    klass: typing.Type[typing.Any],
+) -> typing.Tuple[msgspec.json.Decoder, typing.Callable[[typing.Any], typing.Any]]:
+    struct, to_dataclass = _mirror(klass)
+    return (msgspec.json.Decoder(struct), to_dataclass)
+
+
+@functools.lru_cache(maxsize=None)
+def _mirror(  # pyre-ignore
+    klass: typing.Type[typing.Any],
+) -> typing.Tuple[typing.Type[msgspec.Struct], typing.Callable[[typing.Any], typing.Any]]:
+    """generates struct type and the function for converting the struct into the given dataclass object"""
+
+    if not dataclasses.is_dataclass(klass):
+        raise UnsupportedTypeError(f"{klass} is not dataclass")
+
+    struct_fields = []
+    env: typing.Dict[str, typing.Any] = {"klass": klass, "ValidationError": msgspec.ValidationError}
+    lines = ["def to_dataclass(s):"]
+    args = []
+    for i, field in enumerate(dataclasses.fields(klass)):
+        field_type = field.type
+        args_types = field_type.__args__ if hasattr(field_type, "__args__") else []
+        is_optional = len(args_types) == 2 and isinstance(None, args_types[1])  # pyre-ignore
+        if is_optional:
+            field_type = args_types[0]
+
+        valid_values = field.metadata.get("valid-values")
+        if isinstance(valid_values, list):
+            struct_type = typing.Literal[tuple(valid_values)]  # pyre-ignore
+        else:
+            struct_type = _mirror_type(field_type)
+        if is_optional:
+            struct_fields.append((field.name, typing.Optional[struct_type], None))
+        else:
+            struct_fields.append((field.name, struct_type))
+
+        val = f"s.{field.name}"
+        if isinstance(valid_values, re.Pattern):
+            env[f"pattern_{i}"] = valid_values
+            lines.append(f"    if {val} is not None and not pattern_{i}.match({val}):")
+            lines.append(f"        raise ValidationError('{field.name} does not match pattern')")
+        if dataclasses.is_dataclass(field_type):
+            env[f"convert_{i}"] = _mirror(field_type)[1]
+            val = f"convert_{i}({val})" + (f" if {val} is not None else None" if is_optional else "")
+        elif _is_list(field_type) and dataclasses.is_dataclass(field_type.__args__[0]):
+            env[f"convert_{i}"] = _mirror(field_type.__args__[0])[1]
+            val = f"[convert_{i}(v) for v in {val}]" + (f" if {val} is not None else None" if is_optional else "")
+        args.append(f"{field.name}={val}")
+    lines.append(f"    return klass({', '.join(args)})")
+
+    struct = msgspec.defstruct(
+        f"{klass.__name__}Struct", struct_fields, kw_only=True, forbid_unknown_fields=True, gc=False
+    )
+    exec("\n".join(lines), env)
+    return (struct, env["to_dataclass"])
+
+
+def _mirror_type(field_type: typing.Any) -> typing.Any:  # pyre-ignore
+    if field_type in _PRIMITIVE_TYPES:
+        return field_type
+    if dataclasses.is_dataclass(field_type):
+        return _mirror(field_type)[0]
+    if _is_list(field_type):
+        return typing.List[_mirror_type(field_type.__args__[0])]  # pyre-ignore
+    # float (msgspec accepts int value for float field) and union types are not supported
+    raise UnsupportedTypeError(f"unsupported field type: {field_type}")
+
+
+def _is_list(field_type: typing.Any) -> bool:  # pyre-ignore
+    return getattr(field_type, "__origin__", None) == list and bool(getattr(field_type, "__args__", None))
@@ -20,11 +20,23 @@ click.option = functools.partial(click.option, show_default=True)  # pyre-ignore
 def coro(f):  # pyre-ignore
     @functools.wraps(f)
     def wrapper(*args, **kwargs):  # pyre-ignore
+        install_uvloop()
         return asyncio.run(f(*args, **kwargs))
 
     return wrapper
 
 
+def install_uvloop() -> bool:
+    """Sets uvloop event loop policy if uvloop is installed (install `diem[fast]`), returns False otherwise."""
+
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
 def set_env(name: str, is_io: bool = False):  # pyre-ignore
     def callback(_c, _p, val):  # pyre-ignore
         if val:
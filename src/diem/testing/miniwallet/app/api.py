@@ -109,6 +109,7 @@ async def web_api(app: App, disable_events_api: bool = False) -> web.Application
     async def on_cleanup(ap: web.Application) -> None:
         ap["worker"].cancel()
         await ap["worker"]
+        await app.offchain.close()
 
     api.on_startup.append(on_startup)
     api.on_cleanup.append(on_cleanup)
@@ -33,7 +33,12 @@ class App:
         self.store = InMemoryStore()
         self.store.create(Account, id=PENDING_INBOUND_ACCOUNT_ID)
         self.diem_client = client
-        self.offchain = offchain.Client(account.account_address, client, account.hrp)
+        self.offchain = offchain.Client(
+            account.account_address,
+            client,
+            account.hrp,
+            owned_account_ids={a.account_identifier() for a in child_accounts},
+        )
         self.kyc_sample: KycSample = KycSample.gen(name)
         self.event_puller = EventPuller(client=client, store=self.store, hrp=account.hrp, logger=logger)
         self.bg_tasks: List[Callable[[], Awaitable[None]]] = []
@@ -1,20 +1,38 @@
 # Copyright (c) The Diem Core Contributors
 # SPDX-License-Identifier: Apache-2.0
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from random import randrange
-from typing import Tuple, Optional, Union, List
+from typing import Tuple, Optional, Union, List, Dict
 from diem import identifier, offchain, stdlib, utils, txnmetadata, diem_types
 from diem.jsonrpc import AsyncClient
 from diem.testing import LocalAccount, Faucet
 from .models import Transaction, RefundReason
 
 
+# minimum balance kept above the payment amount when checking the locally tracked balance, covers gas fees.
+BALANCE_CACHE_SAFETY_MARGIN: int = 1_000_000
+
+
 @dataclass
 class DiemAccount:
     _account: LocalAccount
     _child_accounts: List[LocalAccount]
     _client: AsyncClient
+    _child_by_address: Dict[diem_types.AccountAddress, LocalAccount] = field(init=False, repr=False)
+    _auth_key_hex_by_address: Dict[diem_types.AccountAddress, str] = field(init=False, repr=False)
+    _faucet: Faucet = field(init=False, repr=False)
+    # lower bound of account balances by (account address, currency), decreased by submitted payments
+    _balance_cache: Dict[Tuple[diem_types.AccountAddress, str], int] = field(
+        default_factory=dict, init=False, repr=False
+    )
+
+    def __post_init__(self) -> None:
+        self._child_by_address = {a.account_address: a for a in self._child_accounts}
+        self._auth_key_hex_by_address = {
+            a.account_address: a.auth_key.hex() for a in [self._account] + self._child_accounts
+        }
+        self._faucet = Faucet(self._client)
 
     @property
     def hrp(self) -> str:
@@ -64,25 +82,39 @@ class DiemAccount:
             metadata=metadata[0],
             metadata_signature=metadata[1],
         )
-        return await from_account.submit_txn(self._client, payload)
+        signed_txn = await from_account.submit_txn(self._client, payload)
+        key = (from_account.account_address, txn.currency)
+        if key in self._balance_cache:
+            self._balance_cache[key] -= txn.amount
+        return signed_txn
 
     def _get_payment_account(self, address: Optional[diem_types.AccountAddress] = None) -> LocalAccount:
         if address is None:
             if self._child_accounts:
                 return self._child_accounts[randrange(len(self._child_accounts))]
             return self._account
-        for account in self._child_accounts:
-            if account.account_address == address:
-                return account
-        raise ValueError(
+        account = self._child_by_address.get(address)
+        if account is not None:
+            return account
+        err = ValueError(
             "could not find account by address: %s in child accounts: %s"
-            % (address.to_hex(), list(map(lambda a: a.to_dict(), self._child_accounts)))
+            % (address.to_hex(), ", ".join(a.account_address.to_hex() for a in self._child_accounts))
         )
+        err.child_accounts = self._child_accounts  # pyre-ignore
+        raise err
 
     async def _ensure_account_balance(self, account: LocalAccount, txn: Transaction) -> None:
-        data = await self._client.must_get_account(account.account_address)
+        address = account.account_address
+        key = (address, txn.currency)
+        if self._balance_cache.get(key, 0) >= txn.amount + BALANCE_CACHE_SAFETY_MARGIN:
+            return
+
+        data = await self._client.must_get_account(address)
         amount = max(txn.amount, 1_000_000_000_000)
         for balance in data.balances:
-            if balance.currency == txn.currency and balance.amount < txn.amount:
-                await Faucet(self._client).mint(account.auth_key.hex(), amount, txn.currency)
+            if balance.currency == txn.currency:
+                self._balance_cache[key] = balance.amount
+                if balance.amount < txn.amount:
+                    await self._faucet.mint(self._auth_key_hex_by_address[address], amount, txn.currency)
+                    self._balance_cache[key] += amount
                 return
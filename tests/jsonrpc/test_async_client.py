@@ -431,6 +431,50 @@ async def test_raises_error_if_primary_and_backup_both_failed():
         assert await client.get_currencies()
 
 
+async def test_batch_sends_calls_in_one_request():
+    client = AsyncClient("url")
+
+    async def send_request(url, request, ignore_stale_response):
+        assert [r["method"] for r in request] == ["get_metadata", "get_currencies"]
+        return [
+            {"jsonrpc": "2.0", "id": 1, "result": [{"code": XUS}]},
+            {"jsonrpc": "2.0", "id": 0, "result": {"script_hash_allow_list": [url]}},
+        ]
+
+    client._send_http_request = send_request
+    metadata, currencies = await client.batch([("get_metadata", []), ("get_currencies", [])])
+    assert metadata.script_hash_allow_list == ["url"]
+    assert [c.code for c in currencies] == [XUS]
+
+
+async def test_batch_raises_error_for_error_response():
+    client = AsyncClient("url")
+
+    async def send_request(url, request, ignore_stale_response):
+        return [
+            {"jsonrpc": "2.0", "id": 0, "result": {"script_hash_allow_list": [url]}},
+            {"jsonrpc": "2.0", "id": 1, "error": {"code": -32600}},
+        ]
+
+    client._send_http_request = send_request
+    with pytest.raises(jsonrpc.JsonRpcError):
+        await client.batch([("get_metadata", []), ("get_currencies", [])])
+
+
+async def test_batch_falls_back_to_execute_calls_one_by_one():
+    client = AsyncClient("url")
+    send_metadata = gen_metadata_response(client)
+
+    async def send_request(url, request, ignore_stale_response):
+        if isinstance(request, list):
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": -32600}}
+        return await send_metadata(url, request, ignore_stale_response)
+
+    client._send_http_request = send_request
+    results = await client.batch([("get_metadata", []), ("get_metadata", [])])
+    assert [m.script_hash_allow_list for m in results] == [["url"], ["url"]]
+
+
 def gen_metadata_response(client, fail=None, snap=None):
     async def send_request(url, request, ignore_stale_response):
         if fail == url:
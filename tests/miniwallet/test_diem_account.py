@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: Apache-2.0
 
 
+from diem import jsonrpc, diem_types
 from diem.testing import LocalAccount, create_client, Faucet, XUS
 from diem.testing.miniwallet.app import Transaction
 from diem.testing.miniwallet.app.diem_account import DiemAccount
@@ -34,6 +35,46 @@ async def test_submit_p2p_with_unknown_address():
         await da.submit_p2p(gen_txn(payee=payee), (b"", b""), by_address=LocalAccount().account_address)
 
 
+async def test_get_payment_account_by_address():
+    account = LocalAccount.generate()
+    children = [LocalAccount.generate() for _ in range(3)]
+    da = DiemAccount(account, children, create_client())
+    for child in children:
+        assert da._get_payment_account(child.account_address) is child
+    assert da._get_payment_account() in children
+    with pytest.raises(ValueError, match=children[0].account_address.to_hex()) as err:
+        da._get_payment_account(LocalAccount.generate().account_address)
+    assert err.value.child_accounts == children
+
+
+async def test_balance_cache_skips_get_account_until_balance_is_low():
+    account, payee = LocalAccount.generate(), LocalAccount.generate()
+    client = FakeClient(balance=10_000_000)
+    da = DiemAccount(account, [], client)
+    for _ in range(3):
+        await da.submit_p2p(gen_txn(payee=payee.account_identifier(), amount=2_000_000), (b"", b""))
+    assert client.calls == ["must_get_account", "submit", "submit", "submit"]
+    assert da._balance_cache[(account.account_address, XUS)] == 4_000_000
+
+    await da.submit_p2p(gen_txn(payee=payee.account_identifier(), amount=3_500_000), (b"", b""))
+    assert client.calls[4:] == ["must_get_account", "submit"]
+    assert da._balance_cache[(account.account_address, XUS)] == 6_500_000
+
+
+async def test_mint_coins_when_balance_is_not_enough():
+    account, payee = LocalAccount.generate(), LocalAccount.generate()
+    da = DiemAccount(account, [], FakeClient(balance=1))
+    minted = []
+
+    async def mint(auth_key: str, amount: int, currency: str) -> None:
+        minted.append((auth_key, amount, currency))
+
+    da._faucet.mint = mint
+    await da.submit_p2p(gen_txn(payee=payee.account_identifier(), amount=2), (b"", b""))
+    assert minted == [(account.auth_key.hex(), 1_000_000_000_000, XUS)]
+    assert da._balance_cache[(account.account_address, XUS)] == 1_000_000_000_000 - 1
+
+
 async def test_ensure_account_balance_is_always_enough():
     client = create_client()
     faucet = Faucet(client)
@@ -58,3 +99,19 @@ def gen_txn(payee: str, amount: int = 1) -> Transaction:
         payee=payee,
         payee_account_identifier=payee,
     )
+
+
+class FakeClient:
+    def __init__(self, balance: int) -> None:
+        self.balance = balance
+        self.calls = []
+
+    async def must_get_account(self, address: diem_types.AccountAddress) -> jsonrpc.Account:
+        self.calls.append("must_get_account")
+        return jsonrpc.Account(balances=[jsonrpc.Amount(amount=self.balance, currency=XUS)])
+
+    async def get_account_sequence(self, address: diem_types.AccountAddress) -> int:
+        return 0
+
+    async def submit(self, txn: diem_types.SignedTransaction) -> None:
+        self.calls.append("submit")
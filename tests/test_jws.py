@@ -62,6 +62,15 @@ def test_encode_decode_message_with_headers_and_content_detached():
     )
 
 
+def test_decode_message_with_non_compact_json_headers():
+    header = jws.encode_b64url(b'{"alg": "EdDSA"}')
+    payload = jws.encode_b64url(MSG.encode("utf-8"))
+    sig = jws.encode_b64url(KEY.sign(jws.signing_message(payload, header)))
+    headers, body = jws.decode(b".".join([header, payload, sig]), PUBLIC_KEY.verify)
+    assert headers == {"alg": "EdDSA"}
+    assert body == MSG
+
+
 def test_decode_example_jws():
     example = "eyJhbGciOiJFZERTQSJ9.U2FtcGxlIHNpZ25lZCBwYXlsb2FkLg.dZvbycl2Jkl3H7NmQzL6P0_lDEW42s9FrZ8z-hXkLqYyxNq8yOlDjlP9wh3wyop5MU2sIOYvay-laBmpdW6OBQ"
     public_key = "bd47e3e7afb94debbd82e10ab7d410a885b589db49138628562ac2ec85726129"
@@ -1,18 +1,260 @@
 # Copyright (c) The Diem Core Contributors
 # SPDX-License-Identifier: Apache-2.0
 
-from diem import offchain
+from diem import offchain, identifier, jsonrpc, testnet
+from diem.testing import LocalAccount
+import asyncio, dataclasses, pytest, uuid
 
 
 def test_is_under_the_threshold():
-    assert offchain.client._is_under_the_threshold(2, 0.2, 1)
-    assert offchain.client._is_under_the_threshold(2, 0.2, 5)
-    assert not offchain.client._is_under_the_threshold(2, 0.2, 6)
-    assert not offchain.client._is_under_the_threshold(2, 0.2, 10)
+    assert offchain.client._is_under_the_threshold(2, 2, 10, 1)
+    assert offchain.client._is_under_the_threshold(2, 2, 10, 5)
+    assert not offchain.client._is_under_the_threshold(2, 2, 10, 6)
+    assert not offchain.client._is_under_the_threshold(2, 2, 10, 10)
 
+    rate_scaled = round(0.2 * offchain.client.EXCHANGE_RATE_SCALE)
+    assert offchain.client._is_under_the_threshold(2, rate_scaled, offchain.client.EXCHANGE_RATE_SCALE, 5)
+    assert not offchain.client._is_under_the_threshold(2, rate_scaled, offchain.client.EXCHANGE_RATE_SCALE, 6)
 
-def test_filter_supported_currency_codes():
-    assert ["XUS", "XDX"] == offchain.client._filter_supported_currency_codes(None, ["XUS", "XDX"])
-    assert ["XUS"] == offchain.client._filter_supported_currency_codes(["XUS"], ["XUS", "XDX"])
-    assert ["XDX"] == offchain.client._filter_supported_currency_codes(None, ["XDX"])
-    assert [] == offchain.client._filter_supported_currency_codes(["XUS"], ["XDX"])
+
+@pytest.mark.asyncio
+async def test_validate_currency_code():
+    currencies = [jsonrpc.CurrencyInfo(code="XUS"), jsonrpc.CurrencyInfo(code="XDX")]
+    client = offchain.Client(LocalAccount.generate().account_address, None, identifier.TDM)
+    await client.validate_currency_code("XUS", currencies)
+    await client.validate_currency_code("XDX", currencies)
+    with pytest.raises(offchain.client.InvalidCurrencyCodeError):
+        await client.validate_currency_code("ABC", currencies)
+
+    client = offchain.Client(LocalAccount.generate().account_address, None, identifier.TDM, ["XUS"])
+    await client.validate_currency_code("XUS", currencies)
+    with pytest.raises(offchain.client.UnsupportedCurrencyCodeError):
+        await client.validate_currency_code("XDX", currencies)
+    with pytest.raises(offchain.client.InvalidCurrencyCodeError):
+        await client.validate_currency_code("XDX", currencies[:1])
+
+
+def test_validate_actor_address(factory):
+    client = offchain.Client(LocalAccount.generate().account_address, None, identifier.TDM)
+    payment = factory.new_payment_object()
+    client.validate_actor_address("sender", payment.sender)
+    assert offchain.client._decode_account_id.cache_info().currsize > 0
+
+    with pytest.raises(offchain.Error, match="could not decode account identifier") as e:
+        client.validate_actor_address("sender", dataclasses.replace(payment.sender, address="invalid"))
+    assert e.value.obj.field == "command.payment.sender.address"
+
+
+def test_new_cid():
+    cid = offchain.client._new_cid()
+    assert offchain.UUID_REGEX.match(cid)
+    assert uuid.UUID(cid).version == 4
+    assert str(uuid.UUID(cid)) == cid
+    assert cid != offchain.client._new_cid()
+
+
+@pytest.mark.asyncio
+async def test_reuse_session_until_closed():
+    client = offchain.Client(LocalAccount.generate().account_address, None, identifier.TDM)
+    session = client.session()
+    assert client.session() is session
+
+    await client.close()
+    assert session.closed
+    assert client.session() is not session
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_background_tasks():
+    client = offchain.Client(LocalAccount.generate().account_address, None, identifier.TDM)
+    client._run_in_background(asyncio.sleep(10))
+    task = next(iter(client._background_tasks))
+
+    await client.close()
+    assert task.cancelled()
+    assert not client._background_tasks
+
+
+@pytest.mark.asyncio
+async def test_limit_concurrent_requests_per_host():
+    client = offchain.Client(
+        LocalAccount.generate().account_address, None, identifier.TDM, max_concurrent_requests_per_host=2
+    )
+    sem = client.host_semaphore("http://vasp.com:8080/offchain/v2/command")
+    assert client.host_semaphore("http://vasp.com:8080/v2/command") is sem
+    assert client.host_semaphore("http://other.com:8080/v2/command") is not sem
+
+    running, max_running = [], []
+
+    async def request():
+        async with client.host_semaphore("http://vasp.com:8080/v2/command"):
+            running.append(1)
+            max_running.append(len(running))
+            await asyncio.sleep(0.01)
+            running.pop()
+
+    await asyncio.gather(*[request() for _ in range(5)])
+    assert max(max_running) == 2
+
+
+@pytest.mark.asyncio
+async def test_ttl_cache_coalesces_concurrent_misses():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    cache = offchain.client._TtlCache(ttl_secs=60)
+    assert await asyncio.gather(cache.get("k", fetch), cache.get("k", fetch)) == [1, 1]
+    assert await cache.get("k", fetch) == 1
+
+    cache.invalidate("k")
+    assert await cache.get("k", fetch) == 2
+
+
+@pytest.mark.asyncio
+async def test_ttl_cache_keeps_lock_of_new_fetch_after_failed_fetch():
+    calls = []
+    release = asyncio.Event()
+
+    async def fail():
+        calls.append("fail")
+        await asyncio.sleep(0.01)
+        raise ValueError("failed")
+
+    async def fetch():
+        calls.append("fetch")
+        await release.wait()
+        return 1
+
+    cache = offchain.client._TtlCache(ttl_secs=60)
+    first = asyncio.ensure_future(cache.get("k", fail))
+    await asyncio.sleep(0)
+    waiter = asyncio.ensure_future(cache.get("k", fail))
+    with pytest.raises(ValueError):
+        await first
+
+    # the waiter holds the lock popped by the failed fetch, a new caller fetches with a new lock
+    second = asyncio.ensure_future(cache.get("k", fetch))
+    with pytest.raises(ValueError):
+        await waiter
+    # the new lock is kept after the waiter failed, so that the next caller waits for the second fetch
+    third = asyncio.ensure_future(cache.get("k", fetch))
+    await asyncio.sleep(0)
+    release.set()
+    assert await asyncio.gather(second, third) == [1, 1]
+    assert calls == ["fail", "fail", "fetch"]
+
+
+@pytest.mark.asyncio
+async def test_ttl_cache_expires_entries():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return len(calls)
+
+    cache = offchain.client._TtlCache(ttl_secs=0)
+    assert await cache.get("k", fetch) == 1
+    assert await cache.get("k", fetch) == 2
+
+
+def test_ttl_cache_drops_expired_and_earliest_entries(monkeypatch):
+    cache = offchain.client._TtlCache(ttl_secs=60, max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("a", 3)
+    cache.put("c", 4)
+    assert list(cache._entries) == ["a", "c"]
+
+    now = [100.0]
+    monkeypatch.setattr(offchain.client.time, "monotonic", lambda: now[0])
+    cache = offchain.client._TtlCache(ttl_secs=10)
+    cache.put("a", 1)
+    now[0] += 5
+    cache.put("b", 2)
+    now[0] += 6
+    cache.put("c", 3)
+    assert list(cache._entries) == ["b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_cache_command_url_with_compliance_key():
+    account, counterparty = LocalAccount.generate(), LocalAccount.generate()
+    jsonrpc_client = FakeJsonRpcClient(counterparty.compliance_key.public_key())
+    client = offchain.Client(account.account_address, jsonrpc_client, identifier.TDM)
+
+    info = await client._get_counterparty_info(counterparty.account_identifier())
+    assert info == ("http://localhost", jsonrpc_client.public_key, "http://localhost/v2/command")
+    assert await client.get_base_url_and_compliance_key(counterparty.account_identifier()) == info[:2]
+    assert jsonrpc_client.calls == ["get_base_url_and_compliance_key"]
+
+
+@pytest.mark.asyncio
+async def test_process_inbound_payment_command_request_fetches_onchain_data_concurrently(factory):
+    sender, receiver = LocalAccount.generate(), LocalAccount.generate()
+    payment = factory.new_payment_object(sender, receiver)
+    jsonrpc_client = FakeJsonRpcClient(sender.compliance_key.public_key())
+    client = offchain.Client(receiver.account_address, jsonrpc_client, identifier.TDM)
+    request = offchain.new_payment_request(payment)
+
+    cmd = await client.process_inbound_payment_command_request(payment.sender.address, request)
+    assert cmd.my_actor_address == payment.receiver.address
+    assert jsonrpc_client.calls.index("batch") < jsonrpc_client.calls.index("get_account:done")
+
+
+@pytest.mark.asyncio
+async def test_process_inbound_payment_command_request_skips_fetching_fresh_metadata(factory):
+    sender, receiver = LocalAccount.generate(), LocalAccount.generate()
+    payment = factory.new_payment_object(sender, receiver)
+    jsonrpc_client = FakeJsonRpcClient(sender.compliance_key.public_key())
+    client = offchain.Client(receiver.account_address, jsonrpc_client, identifier.TDM)
+    request = offchain.new_payment_request(payment)
+
+    await client.process_inbound_payment_command_request(payment.sender.address, request)
+    await client.process_inbound_payment_command_request(payment.sender.address, request)
+    assert jsonrpc_client.calls.count("batch") == 1
+
+
+@pytest.mark.asyncio
+async def test_is_my_account_id_checks_owned_account_ids_before_fetching_account():
+    parent, child, other = LocalAccount.generate(), LocalAccount.generate(), LocalAccount.generate()
+    jsonrpc_client = FakeJsonRpcClient(parent.compliance_key.public_key())
+    client = offchain.Client(
+        parent.account_address, jsonrpc_client, identifier.TDM, owned_account_ids={child.account_identifier()}
+    )
+
+    assert await client.is_my_account_id(parent.account_identifier(identifier.gen_subaddress()))
+    assert await client.is_my_account_id(child.account_identifier(identifier.gen_subaddress()))
+    assert jsonrpc_client.calls == []
+
+    assert not await client.is_my_account_id(other.account_identifier())
+    assert not await client.is_my_account_id(other.account_identifier(identifier.gen_subaddress()))
+    assert jsonrpc_client.calls == ["get_account", "get_account:done"]
+
+
+class FakeJsonRpcClient:
+    def __init__(self, public_key):
+        self.public_key = public_key
+        self.calls = []
+
+    async def get_account(self, address):
+        self.calls.append("get_account")
+        await asyncio.sleep(0.01)
+        self.calls.append("get_account:done")
+        return None
+
+    async def get_base_url_and_compliance_key(self, address):
+        self.calls.append("get_base_url_and_compliance_key")
+        return ("http://localhost", self.public_key)
+
+    async def get_currencies(self):
+        self.calls.append("get_currencies")
+        return [jsonrpc.CurrencyInfo(code=testnet.TEST_CURRENCY_CODE, to_xdx_exchange_rate=1)]
+
+    async def batch(self, calls):
+        self.calls.append("batch")
+        return [jsonrpc.Metadata(dual_attestation_limit=1_000), await self.get_currencies()]
@@ -1,9 +1,9 @@
 # Copyright (c) The Diem Core Contributors
 # SPDX-License-Identifier: Apache-2.0
 
-from diem import offchain
+from diem import offchain, jws
 from diem.testing import LocalAccount
-import cryptography, pytest
+import cryptography, json, pytest
 
 
 def test_serialize_deserialize():
@@ -22,6 +22,36 @@ def test_serialize_deserialize():
     assert resp == response
 
 
+@pytest.mark.asyncio
+async def test_deserialize_with_signature_verified_in_thread_pool():
+    account = LocalAccount.generate()
+    response = offchain.CommandResponseObject(status=offchain.CommandResponseStatus.success, cid="cid")
+    ret = offchain.jws.serialize(response, account.compliance_key.sign)
+
+    public_key = account.compliance_key.public_key()
+    assert await offchain.client._deserialize_jws(ret, offchain.CommandResponseObject, public_key) == response
+
+    other_key = LocalAccount.generate().compliance_key.public_key()
+    with pytest.raises(offchain.Error, match="invalid_jws_signature"):
+        await offchain.client._deserialize_jws(ret, offchain.CommandResponseObject, other_key)
+
+
+def test_serialize_deserialize_without_orjson(monkeypatch):
+    monkeypatch.setattr(offchain.types, "orjson", None)
+    test_serialize_deserialize()
+
+
+def test_deserialize_error_for_invalid_json(monkeypatch):
+    account = LocalAccount.generate()
+    data = jws.encode(b"{invalid", account.compliance_key.sign)
+    with pytest.raises(json.JSONDecodeError):
+        offchain.jws.deserialize(data, offchain.CommandResponseObject, account.compliance_key.public_key().verify)
+
+    monkeypatch.setattr(offchain.types, "orjson", None)
+    with pytest.raises(json.JSONDecodeError):
+        offchain.jws.deserialize(data, offchain.CommandResponseObject, account.compliance_key.public_key().verify)
+
+
 def test_deserialize_error_for_invalid_signature():
     account = LocalAccount.generate()
     response = offchain.CommandResponseObject(
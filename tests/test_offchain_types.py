@@ -421,6 +421,21 @@ def test_missing_required_field():
     )
 
 
+def test_decode_payment_command_by_msgspec(factory, monkeypatch):
+    pytest.importorskip("msgspec")
+    request = offchain.new_payment_request(factory.new_payment_object())
+    data = offchain.to_json_bytes(request)
+    assert offchain.types._msgspec.decode(data, offchain.CommandRequestObject) == request
+    command = offchain.types._msgspec.convert(request.command, offchain.PaymentCommandObject)
+    assert command == offchain.from_dict(request.command, offchain.PaymentCommandObject)
+    with pytest.raises(offchain.types._msgspec.msgspec.ValidationError):
+        offchain.types._msgspec.convert({**request.command, "unknown": 1}, offchain.PaymentCommandObject)
+
+    monkeypatch.setattr(offchain.types, "_msgspec", None)
+    assert offchain.from_json(data, offchain.CommandRequestObject) == request
+    assert offchain.from_dict(request.command, offchain.PaymentCommandObject) == command
+
+
 def test_reference_id_command_result_object():
     # Test can encode and decode correct response format
     ref_id_command_result = offchain.ReferenceIDCommandResultObject(
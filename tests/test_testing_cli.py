@@ -8,7 +8,7 @@ from diem.testing.miniwallet import ServerConfig, RestClient
 from diem.testing import LocalAccount
 from diem import identifier, testnet, utils
 from typing import List
-import json, threading, pytest, pkg_resources, time, asyncio
+import json, threading, pytest, pkg_resources, time, asyncio, sys, types
 
 
 @pytest.fixture(autouse=True)
@@ -37,6 +37,25 @@ def test_help_shortcut(runner: CliRunner) -> None:
         assert ("-h, --help") in result.output
 
 
+def test_install_uvloop(monkeypatch) -> None:
+    policy = object()
+    monkeypatch.setitem(sys.modules, "uvloop", types.SimpleNamespace(EventLoopPolicy=lambda: policy))
+    policies = []
+    monkeypatch.setattr(asyncio, "set_event_loop_policy", policies.append)
+
+    assert cli.install_uvloop()
+    assert policies == [policy]
+
+
+def test_install_uvloop_without_uvloop_installed(monkeypatch) -> None:
+    monkeypatch.setitem(sys.modules, "uvloop", None)
+    policies = []
+    monkeypatch.setattr(asyncio, "set_event_loop_policy", policies.append)
+
+    assert not cli.install_uvloop()
+    assert policies == []
+
+
 def test_gen_diem_account_config(runner: CliRunner) -> None:
     result = runner.invoke(cli.gen_diem_account_config, [])
 